@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Parallel driver for convert-to-glb.py
+Fans out one headless Blender process per input file across a process pool.
+
+Usage: python3 batch-convert.py <input_glob> <output_dir> [options]
+
+Options:
+  --workers N       Number of parallel Blender processes (default: cpu count)
+  --blender PATH    Blender executable (default: 'blender' on PATH)
+  --no-draco        Forwarded to convert-to-glb.py
+  --export-muscles  Forwarded to convert-to-glb.py
+"""
+
+import concurrent.futures
+import glob
+import os
+import shutil
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONVERT_SCRIPT = os.path.join(SCRIPT_DIR, 'convert-to-glb.py')
+
+# Base port for per-worker Blender RPC; each worker gets its own offset
+# to avoid "RPC_PORT already started" collisions between instances.
+RPC_PORT_BASE = 9400
+RPC_PORT_RANGE = 500
+
+# Submit at most this many jobs ahead of completion so memory stays
+# bounded on many-file runs.
+CHUNK_SIZE = 32
+
+def convert_one(blender, input_path, output_path, extra_args):
+    """Run one Blender conversion subprocess, returns (input_path, returncode)"""
+    # Derive the RPC port from this worker process's pid so concurrent
+    # Blender instances never share one, regardless of how the pool
+    # schedules jobs onto processes
+    env = dict(os.environ)
+    env['BLENDER_RPC_PORT'] = str(RPC_PORT_BASE + os.getpid() % RPC_PORT_RANGE)
+
+    result = subprocess.run(
+        [blender, '--background', '--factory-startup',
+         '--python', CONVERT_SCRIPT, '--', input_path, output_path] + extra_args,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        print(f"  ✗ {input_path}: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'}")
+    else:
+        print(f"  ✓ {input_path} -> {output_path}")
+
+    return input_path, result.returncode
+
+def main():
+    argv = sys.argv[1:]
+    if len(argv) < 2:
+        print("Usage: python3 batch-convert.py <input_glob> <output_dir> [--workers N] [--blender PATH] [--no-draco] [--export-muscles]")
+        sys.exit(1)
+
+    input_glob = argv[0]
+    output_dir = argv[1]
+
+    workers = os.cpu_count() or 1
+    if '--workers' in argv:
+        workers = int(argv[argv.index('--workers') + 1])
+
+    blender = 'blender'
+    if '--blender' in argv:
+        blender = argv[argv.index('--blender') + 1]
+
+    extra_args = [a for a in argv[2:] if a in ('--no-draco', '--export-muscles')]
+
+    if shutil.which(blender) is None:
+        print(f"Error: Blender not found: {blender}")
+        sys.exit(1)
+
+    inputs = sorted(glob.glob(input_glob))
+    if not inputs:
+        print(f"No files matched: {input_glob}")
+        sys.exit(1)
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Converting {len(inputs)} files with {workers} workers")
+
+    def job_failed(future):
+        try:
+            return future.result()[1] != 0
+        except Exception as e:
+            print(f"  ✗ conversion failed: {e}")
+            return True
+
+    error_count = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # Chunked submission: keep a bounded window of in-flight jobs
+        pending = set()
+        for input_path in inputs:
+            name = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(output_dir, f"{name}.glb")
+            pending.add(pool.submit(convert_one, blender, input_path, output_path,
+                                    extra_args))
+
+            if len(pending) >= CHUNK_SIZE:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                error_count += sum(1 for f in done if job_failed(f))
+
+        for f in concurrent.futures.as_completed(pending):
+            if job_failed(f):
+                error_count += 1
+
+    print(f"Done: {len(inputs) - error_count} converted, {error_count} errors")
+    if error_count > 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
